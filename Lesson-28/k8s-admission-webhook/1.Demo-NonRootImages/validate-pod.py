@@ -1,64 +1,84 @@
-from flask import Flask, request, jsonify
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+import orjson
 import logging
 import os
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (LOG_LEVEL env overrides the WARNING default)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib encoder"""
+    def render(self, content):
+        return orjson.dumps(content)
 
-@app.route('/', methods=['GET'])
-def root():
-    return jsonify({"status": "healthy", "message": "Pod Validator Webhook is running"})
+def _review_response(uid, allowed, msg):
+    """Wrap a verdict in an AdmissionReview reply"""
+    return ORJSONResponse({
+        "apiVersion": "admission.k8s.io/v1",
+        "kind": "AdmissionReview",
+        "response": {"uid": uid, "allowed": allowed, "status": {"message": msg}}
+    })
 
-@app.route('/health', methods=['GET'])
-def health():
-    return jsonify({"status": "healthy"})
+# Reply for malformed AdmissionReviews, serialised once at import
+_INVALID_BODY = orjson.dumps({
+    "apiVersion": "admission.k8s.io/v1",
+    "kind": "AdmissionReview",
+    "response": {"uid": "", "allowed": False, "status": {"message": "Invalid request"}}
+})
 
-@app.route('/validate', methods=['POST'])
-def validate():
+# Reply for the webhook's own namespace, split around the uid so only the uid
+# is encoded per request
+_SKIP_PREFIX = b'{"apiVersion":"admission.k8s.io/v1","kind":"AdmissionReview","response":{"uid":'
+_SKIP_SUFFIX = b',"allowed":true,"status":{"message":"Skipped validation in webhook-demo namespace"}}}'
+
+# Reply when the handler itself fails; the uid is spliced in when it is known
+_ERROR_BODY = orjson.dumps({
+    "apiVersion": "admission.k8s.io/v1",
+    "kind": "AdmissionReview",
+    "response": {"uid": "", "allowed": False, "status": {"message": "Validation error"}}
+})
+_ERROR_PREFIX = _SKIP_PREFIX
+_ERROR_SUFFIX = b',"allowed":false,"status":{"message":"Validation error"}}}'
+
+async def root(request: Request):
+    return ORJSONResponse({"status": "healthy", "message": "Pod Validator Webhook is running"})
+
+async def health(request: Request):
+    return ORJSONResponse({"status": "healthy"})
+
+async def validate(request: Request):
+    uid = ""
     try:
-        req = request.get_json()
-        logger.info(f"Received validation request")
+        req = orjson.loads(await request.body())
+        logger.info("Received validation request")
         
         if not req or "request" not in req:
-            return jsonify({
-                "apiVersion": "admission.k8s.io/v1",
-                "kind": "AdmissionReview",
-                "response": {
-                    "uid": "",
-                    "allowed": False,
-                    "status": {"message": "Invalid request"}
-                }
-            })
+            return Response(_INVALID_BODY, media_type="application/json")
         
-        uid = req["request"]["uid"]
+        admission_request = req["request"]
+        uid = admission_request["uid"]
+        pod = admission_request["object"]
         
         # Get pod metadata
-        pod_metadata = req["request"]["object"].get("metadata", {})
+        pod_metadata = pod.get("metadata", {})
         pod_namespace = pod_metadata.get("namespace", "")
         pod_name = pod_metadata.get("name", "")
         
-        logger.info(f"Validating pod: {pod_name} in namespace: {pod_namespace}")
+        logger.info("Validating pod: %s in namespace: %s", pod_name, pod_namespace)
         
         # Skip validation for webhook's own namespace
         if pod_namespace == "webhook-demo":
             logger.info("Skipping validation for webhook-demo namespace")
-            return jsonify({
-                "apiVersion": "admission.k8s.io/v1",
-                "kind": "AdmissionReview",
-                "response": {
-                    "uid": uid,
-                    "allowed": True,
-                    "status": {"message": "Skipped validation in webhook-demo namespace"}
-                }
-            })
+            return Response(_SKIP_PREFIX + orjson.dumps(uid) + _SKIP_SUFFIX, media_type="application/json")
         
         allowed = True
         msg = "Pod is valid"
 
-        pod_spec = req["request"]["object"]["spec"]
+        pod_spec = pod["spec"]
         containers = pod_spec.get("containers", [])
 
         for c in containers:
@@ -68,32 +88,18 @@ def validate():
                 msg = f"Container '{c['name']}' must set runAsNonRoot=true"
                 break
 
-        logger.info(f"Validation result: allowed={allowed}, message={msg}")
-        
-        response = {
-            "apiVersion": "admission.k8s.io/v1",
-            "kind": "AdmissionReview",
-            "response": {
-                "uid": uid, 
-                "allowed": allowed, 
-                "status": {"message": msg}
-            }
-        }
+        logger.info("Validation result: allowed=%s, message=%s", allowed, msg)
         
-        return jsonify(response)
+        return _review_response(uid, allowed, msg)
     
     except Exception as e:
-        logger.error(f"Error in validation: {str(e)}")
-        return jsonify({
-            "apiVersion": "admission.k8s.io/v1",
-            "kind": "AdmissionReview",
-            "response": {
-                "uid": req.get("request", {}).get("uid", ""),
-                "allowed": False,
-                "status": {"message": f"Validation error: {str(e)}"}
-            }
-        })
+        logger.error("Error in validation: %s", e)
+        if not uid:
+            return Response(_ERROR_BODY, media_type="application/json")
+        return Response(_ERROR_PREFIX + orjson.dumps(uid) + _ERROR_SUFFIX, media_type="application/json")
 
-if __name__ == '__main__':
-    logger.info("Starting webhook server on port 8443")
-    app.run(host='0.0.0.0', port=8443, ssl_context=('/certs/tls.crt', '/certs/tls.key'))
\ No newline at end of file
+app = Starlette(routes=[
+    Route('/', root, methods=['GET']),
+    Route('/health', health, methods=['GET']),
+    Route('/validate', validate, methods=['POST']),
+])
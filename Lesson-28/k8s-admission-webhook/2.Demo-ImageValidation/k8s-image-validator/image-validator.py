@@ -1,223 +1,279 @@
-from flask import Flask, request, jsonify
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+import orjson
+from functools import lru_cache
+from itertools import chain
 import logging
 import os
 import re
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (LOG_LEVEL env overrides the WARNING default)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib encoder"""
+    def render(self, content):
+        return orjson.dumps(content)
+
+def _review_response(uid, allowed, msg):
+    """Wrap a verdict in an AdmissionReview reply"""
+    return ORJSONResponse({
+        "apiVersion": "admission.k8s.io/v1",
+        "kind": "AdmissionReview",
+        "response": {"uid": uid, "allowed": allowed, "status": {"message": msg}}
+    })
+
+# Reply for malformed AdmissionReviews, serialised once at import
+_INVALID_BODY = orjson.dumps({
+    "apiVersion": "admission.k8s.io/v1",
+    "kind": "AdmissionReview",
+    "response": {"uid": "", "allowed": False, "status": {"message": "Invalid request"}}
+})
+
+# Reply for the webhook's own namespace, split around the uid so only the uid
+# is encoded per request
+_SKIP_PREFIX = b'{"apiVersion":"admission.k8s.io/v1","kind":"AdmissionReview","response":{"uid":'
+_SKIP_SUFFIX = b',"allowed":true,"status":{"message":"Skipped validation in image-validator-demo namespace"}}}'
+
+# Reply when the handler itself fails; the uid is spliced in when it is known
+_ERROR_BODY = orjson.dumps({
+    "apiVersion": "admission.k8s.io/v1",
+    "kind": "AdmissionReview",
+    "response": {"uid": "", "allowed": False, "status": {"message": "Validation error"}}
+})
+_ERROR_PREFIX = _SKIP_PREFIX
+_ERROR_SUFFIX = b',"allowed":false,"status":{"message":"Validation error"}}}'
 
 # Configuration - In production, this would come from ConfigMap
-APPROVED_REGISTRIES = [
+APPROVED_REGISTRIES = (
     "docker.io",
     "gcr.io",
     "k8s.gcr.io",
     "quay.io",
     "registry.k8s.io",
     "ghcr.io"
-]
+)
+
+BLOCKED_TAGS = frozenset(("latest",))
 
-BLOCKED_TAGS = ["latest"]
+# Bounded memo sizes - image strings and container specs are user-controlled,
+# so the caches must not grow with the number of distinct values seen
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "2048"))
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "4096"))
+# maxsize bounds entries, not bytes: longer images bypass both caches
+CACHEABLE_IMAGE_LENGTH = int(os.getenv("CACHEABLE_IMAGE_LENGTH", "256"))
 
-@app.route('/', methods=['GET'])
-def root():
-    return jsonify({
+# Hashed lookup set and pre-rendered list for error messages
+_APPROVED_SET = frozenset(APPROVED_REGISTRIES)
+_APPROVED_REPR = ", ".join(APPROVED_REGISTRIES)
+
+# Longest image reference we will parse; the apiserver does not limit it
+MAX_IMAGE_LENGTH = 4096
+
+# repo[:tag][@digest] after any registry prefix has been split off. Tags follow
+# the Docker grammar (no ':' or '@'), and the character classes don't overlap,
+# so matching is linear in the length
+_IMAGE_RE = re.compile(r'^(?P<repo>[^:@]+)(?::(?P<tag>\w[\w.-]{0,127}))?(?:@(?P<digest>.+))?$')
+
+# securityContext fields that feed the cached container verdict
+_SECURITY_FIELDS = ("allowPrivilegeEscalation", "readOnlyRootFilesystem", "runAsNonRoot")
+
+_EMPTY = {}  # shared read-only default for absent container sections
+
+async def root(request: Request):
+    return ORJSONResponse({
         "status": "healthy", 
         "message": "Image Validator Webhook is running",
         "version": "1.0.0"
     })
 
-@app.route('/health', methods=['GET'])
-def health():
-    return jsonify({"status": "healthy"})
+async def health(request: Request):
+    return ORJSONResponse({"status": "healthy"})
 
-@app.route('/validate', methods=['POST'])
-def validate():
+async def validate(request: Request):
+    uid = ""
     try:
-        req = request.get_json()
+        req = orjson.loads(await request.body())
         logger.info("Received pod validation request")
         
         if not req or "request" not in req:
-            return jsonify({
-                "apiVersion": "admission.k8s.io/v1",
-                "kind": "AdmissionReview",
-                "response": {
-                    "uid": "",
-                    "allowed": False,
-                    "status": {"message": "Invalid request"}
-                }
-            })
+            return Response(_INVALID_BODY, media_type="application/json")
         
-        uid = req["request"]["uid"]
+        admission_request = req["request"]
+        uid = admission_request["uid"]
+        pod = admission_request["object"]
         
         # Get pod metadata
-        pod_metadata = req["request"]["object"].get("metadata", {})
+        pod_metadata = pod.get("metadata", {})
         pod_namespace = pod_metadata.get("namespace", "")
         pod_name = pod_metadata.get("name", "")
         
-        logger.info(f"Validating pod: {pod_name} in namespace: {pod_namespace}")
+        logger.info("Validating pod: %s in namespace: %s", pod_name, pod_namespace)
         
         # Skip validation for webhook's own namespace
         if pod_namespace == "image-validator-demo":
             logger.info("Skipping validation for image-validator-demo namespace")
-            return jsonify({
-                "apiVersion": "admission.k8s.io/v1",
-                "kind": "AdmissionReview",
-                "response": {
-                    "uid": uid,
-                    "allowed": True,
-                    "status": {"message": "Skipped validation in image-validator-demo namespace"}
-                }
-            })
+            return Response(_SKIP_PREFIX + orjson.dumps(uid) + _SKIP_SUFFIX, media_type="application/json")
         
-        pod_spec = req["request"]["object"]["spec"]
+        pod_spec = pod["spec"]
         containers = pod_spec.get("containers", [])
         init_containers = pod_spec.get("initContainers", [])
         
-        all_containers = containers + init_containers
-        
-        # Validate each container
+        # Validate each container; the loop only touches locals
         validation_errors = []
+        check = _check
+        add_error = validation_errors.append
         
-        for container in all_containers:
-            container_name = container.get("name", "unknown")
-            image = container.get("image", "")
-            
-            # Check 1: Image registry validation
-            registry_approved, registry_msg = validate_image_registry(image, container_name)
-            if not registry_approved:
-                validation_errors.append(registry_msg)
-            
-            # Check 2: Block latest tags
-            tag_blocked, tag_msg = validate_image_tag(image, container_name)
-            if tag_blocked:
-                validation_errors.append(tag_msg)
-            
-            # Check 3: Resource limits
-            resources_valid, resources_msg = validate_resources(container, container_name)
-            if not resources_valid:
-                validation_errors.append(resources_msg)
-            
-            # Check 4: Security context
-            security_valid, security_msg = validate_security_context(container, container_name)
-            if not security_valid:
-                validation_errors.append(security_msg)
+        for container in chain(containers, init_containers):
+            error = check(container)
+            if error is not None:
+                add_error(error)
         
         if validation_errors:
             allowed = False
             msg = " | ".join(validation_errors)
-            logger.warning(f"Pod validation failed: {msg}")
+            logger.warning("Pod validation failed: %s", msg)
         else:
             allowed = True
             msg = "All validations passed"
-            logger.info(f"Pod validation passed: {pod_name}")
+            logger.info("Pod validation passed: %s", pod_name)
         
-        response = {
-            "apiVersion": "admission.k8s.io/v1",
-            "kind": "AdmissionReview",
-            "response": {
-                "uid": uid, 
-                "allowed": allowed, 
-                "status": {"message": msg}
-            }
-        }
-        
-        return jsonify(response)
+        return _review_response(uid, allowed, msg)
     
     except Exception as e:
-        logger.error(f"Error in validation: {str(e)}")
-        return jsonify({
-            "apiVersion": "admission.k8s.io/v1",
-            "kind": "AdmissionReview",
-            "response": {
-                "uid": req.get("request", {}).get("uid", ""),
-                "allowed": False,
-                "status": {"message": f"Validation error: {str(e)}"}
-            }
-        })
-
-def validate_image_registry(image, container_name):
-    """Validate that image comes from approved registry"""
-    if not image:
-        return False, f"Container '{container_name}': Image is required"
+        logger.error("Error in validation: %s", e)
+        if not uid:
+            return Response(_ERROR_BODY, media_type="application/json")
+        return Response(_ERROR_PREFIX + orjson.dumps(uid) + _ERROR_SUFFIX, media_type="application/json")
+
+def _check(container):
+    """Validate one container; returns its error message or None"""
+    security_context = container.get("securityContext") or _EMPTY
+    resources = container.get("resources") or _EMPTY
+    limits = resources.get("limits") or _EMPTY
+    requests = resources.get("requests") or _EMPTY
     
-    # Extract registry
-    parts = image.split('/')
-    if len(parts) > 1:
-        registry = parts[0]
-        if '.' in registry or ':' in registry:  # It's a registry with domain/port
-            if registry not in APPROVED_REGISTRIES:
-                return False, f"Container '{container_name}': Registry '{registry}' not in approved list: {APPROVED_REGISTRIES}"
+    # Hashable views of the fields we validate; missing securityContext keys
+    # are omitted so their defaults still apply
+    sc_key = tuple((field, security_context[field]) for field in _SECURITY_FIELDS if field in security_context)
+    res_key = (limits.get("cpu"), limits.get("memory"), requests.get("cpu"), requests.get("memory"))
     
-    return True, ""
+    image = container.get("image", "")
+    if len(image) > CACHEABLE_IMAGE_LENGTH:
+        return _validate_container.__wrapped__(container.get("name", "unknown"), image, sc_key, res_key)
+    return _validate_container(container.get("name", "unknown"), image, sc_key, res_key)
 
-def validate_image_tag(image, container_name):
-    """Validate that image doesn't use blocked tags"""
+@lru_cache(maxsize=VERDICT_CACHE_SIZE)
+def _validate_container(container_name, image, sc_key, res_key):
+    """Run all container checks; the verdict is a pure function of its arguments"""
+    errors = []
+    
     if not image:
-        return False, f"Container '{container_name}': Image is required"
+        errors.append(f"Container '{container_name}': Image is required")
+    elif len(image) > MAX_IMAGE_LENGTH:
+        errors.append(f"Container '{container_name}': Image reference exceeds {MAX_IMAGE_LENGTH} characters")
+    else:
+        if len(image) > CACHEABLE_IMAGE_LENGTH:
+            parsed = _parse_image.__wrapped__(image)
+        else:
+            parsed = _parse_image(image)
+        if parsed is None:
+            errors.append(f"Container '{container_name}': Invalid image reference '{image}'")
+        else:
+            registry, tag = parsed
+            
+            # Check 1: Image registry validation
+            validate_image_registry(registry, container_name, errors)
+            
+            # Check 2: Block latest tags
+            validate_image_tag(tag, container_name, errors)
     
-    # Extract tag
-    tag = "latest"  # default
-    if ':' in image:
-        tag = image.split(':')[-1]
+    # Check 3: Resource limits
+    validate_resources(res_key, container_name, errors)
     
-    if tag in BLOCKED_TAGS:
-        return True, f"Container '{container_name}': Tag '{tag}' is blocked. Use specific version tags."
+    # Check 4: Security context
+    validate_security_context(dict(sc_key), container_name, errors)
+    
+    return " | ".join(errors) if errors else None
+
+@lru_cache(maxsize=IMAGE_CACHE_SIZE)
+def _parse_image(image):
+    """Split an image reference into (registry, tag), or None if malformed"""
+    # The first path component is a registry only if it looks like a host
+    # (contains a dot or a port)
+    registry = None
+    head, sep, rest = image.partition('/')
+    if sep and ('.' in head or ':' in head):
+        registry, image = head, rest
+    
+    m = _IMAGE_RE.match(image)
+    if m is None:
+        return None
+    
+    tag = m.group("tag")
+    if tag is None and m.group("digest") is None:
+        tag = "latest"  # default
     
-    return False, ""
+    return registry, tag
 
-def validate_resources(container, container_name):
+def validate_image_registry(registry, container_name, errors):
+    """Validate that image comes from approved registry"""
+    if registry is not None and registry not in _APPROVED_SET:
+        errors.append(f"Container '{container_name}': Registry '{registry}' not in approved list: {_APPROVED_REPR}")
+
+def validate_image_tag(tag, container_name, errors):
+    """Validate that image doesn't use blocked tags"""
+    if tag in BLOCKED_TAGS:
+        errors.append(f"Container '{container_name}': Tag '{tag}' is blocked. Use specific version tags.")
+
+def validate_resources(res_key, container_name, errors):
     """Validate that container has resource limits and requests"""
-    resources = container.get("resources", {})
+    limits_cpu, limits_memory, requests_cpu, requests_memory = res_key
     
-    errors = []
+    missing = []
     
     # Check limits
-    limits = resources.get("limits", {})
-    if not limits.get("cpu"):
-        errors.append("CPU limits")
-    if not limits.get("memory"):
-        errors.append("memory limits")
+    if not limits_cpu:
+        missing.append("CPU limits")
+    if not limits_memory:
+        missing.append("memory limits")
     
     # Check requests
-    requests = resources.get("requests", {})
-    if not requests.get("cpu"):
-        errors.append("CPU requests")
-    if not requests.get("memory"):
-        errors.append("memory requests")
+    if not requests_cpu:
+        missing.append("CPU requests")
+    if not requests_memory:
+        missing.append("memory requests")
     
-    if errors:
-        return False, f"Container '{container_name}': Missing {', '.join(errors)}"
-    
-    return True, ""
+    if missing:
+        errors.append(f"Container '{container_name}': Missing {', '.join(missing)}")
 
-def validate_security_context(container, container_name):
+def validate_security_context(security_context, container_name, errors):
     """Validate security context settings"""
-    security_context = container.get("securityContext", {})
-    
-    errors = []
+    required = []
     
     # Check for runAsNonRoot
     if not security_context.get("runAsNonRoot", False):
-        errors.append("runAsNonRoot=true")
+        required.append("runAsNonRoot=true")
     
     # Check for allowPrivilegeEscalation
     if security_context.get("allowPrivilegeEscalation", True):
-        errors.append("allowPrivilegeEscalation=false")
+        required.append("allowPrivilegeEscalation=false")
     
     # Check for readOnlyRootFilesystem
     if not security_context.get("readOnlyRootFilesystem", False):
-        errors.append("readOnlyRootFilesystem=true")
+        required.append("readOnlyRootFilesystem=true")
     
-    if errors:
-        return False, f"Container '{container_name}': Required {', '.join(errors)}"
-    
-    return True, ""
+    if required:
+        errors.append(f"Container '{container_name}': Required {', '.join(required)}")
+
+app = Starlette(routes=[
+    Route('/', root, methods=['GET']),
+    Route('/health', health, methods=['GET']),
+    Route('/validate', validate, methods=['POST']),
+])
 
-if __name__ == '__main__':
-    logger.info("Starting Image Validator Webhook on port 8443")
-    logger.info(f"Approved registries: {APPROVED_REGISTRIES}")
-    logger.info(f"Blocked tags: {BLOCKED_TAGS}")
-    app.run(host='0.0.0.0', port=8443, ssl_context=('/certs/tls.crt', '/certs/tls.key'))
\ No newline at end of file
+logger.info("Approved registries: %s", _APPROVED_REPR)
+logger.info("Blocked tags: %s", ", ".join(sorted(BLOCKED_TAGS)))
@@ -1,9 +1,17 @@
-from kubernetes import client, config, watch
-import time
+from kubernetes_asyncio import client, config, watch
+from kubernetes_asyncio.client.exceptions import ApiException
+import asyncio
 import os
 
-def create_cronjob(cron_name, cron_expr, msg):
-    batch_v1 = client.BatchV1Api()
+# (namespace, CronJob name) pairs already created, being created, or found to exist
+_SEEN: set[tuple[str, str]] = set()
+
+async def create_cronjob(batch_v1, cron_name, cron_expr, msg):
+    key = ("default", f"{cron_name}-job")
+    if key in _SEEN:
+        return
+    # Claim the key before awaiting so a concurrent event for the same CronTab skips
+    _SEEN.add(key)
 
     body = client.V1CronJob(
         metadata=client.V1ObjectMeta(name=f"{cron_name}-job"),
@@ -29,32 +37,76 @@ def create_cronjob(cron_name, cron_expr, msg):
     )
 
     try:
-        batch_v1.create_namespaced_cron_job(namespace="default", body=body)
+        await batch_v1.create_namespaced_cron_job(namespace="default", body=body)
         print(f"✅ Created CronJob: {cron_name}-job")
+    except ApiException as e:
+        if e.status == 409:
+            print(f"ℹ️ CronJob already exists: {cron_name}-job")
+        else:
+            _SEEN.discard(key)
+            print(f"⚠️ Failed to create job: {e}")
     except Exception as e:
+        _SEEN.discard(key)
         print(f"⚠️ Failed to create job: {e}")
 
 
-def main():
-    config.load_incluster_config() if os.getenv("KUBERNETES_SERVICE_HOST") else config.load_kube_config()
-    api = client.CustomObjectsApi()
+async def reconcile():
+    if os.getenv("KUBERNETES_SERVICE_HOST"):
+        config.load_incluster_config()
+    else:
+        await config.load_kube_config()
+
+    # One ApiClient (and aiohttp connection pool) shared by every API call
+    async with client.ApiClient() as api_client:
+        api = client.CustomObjectsApi(api_client)
+        batch_v1 = client.BatchV1Api(api_client)
+        # CronJob creates run as tasks so their POSTs overlap with the watch
+        pending = set()
+
+        print("🚀 Watching CronTab custom resources...")
+        # Resume from the last seen resourceVersion so reconnects don't replay every CronTab
+        rv = ""
+        while True:
+            try:
+                async with watch.Watch() as w:
+                    async for event in w.stream(api.list_namespaced_custom_object,
+                                                group="stable.deepak.com",
+                                                version="v1",
+                                                namespace="default",
+                                                plural="crontabs",
+                                                resource_version=rv,
+                                                timeout_seconds=300,
+                                                allow_watch_bookmarks=True):
+                        cr = event['object']
+                        etype = event['type']
+                        rv = cr['metadata']['resourceVersion']
+
+                        if etype == 'BOOKMARK':
+                            continue
 
-    w = watch.Watch()
-    print("🚀 Watching CronTab custom resources...")
-    for event in w.stream(api.list_namespaced_custom_object,
-                          group="stable.deepak.com",
-                          version="v1",
-                          namespace="default",
-                          plural="crontabs"):
-        cr = event['object']
-        etype = event['type']
-        name = cr['metadata']['name']
-        cronSpec = cr['spec']['cronSpec']
-        message = cr['spec']['message']
+                        name = cr['metadata']['name']
+                        cronSpec = cr['spec']['cronSpec']
+                        message = cr['spec']['message']
 
-        if etype == 'ADDED':
-            print(f"📥 Detected new CronTab: {name}")
-            create_cronjob(name, cronSpec, message)
+                        if etype == 'ADDED':
+                            print(f"📥 Detected new CronTab: {name}")
+                            task = asyncio.create_task(create_cronjob(batch_v1, name, cronSpec, message))
+                            pending.add(task)
+                            task.add_done_callback(pending.discard)
+                        elif etype == 'DELETED':
+                            # Forget it so a re-applied CronTab gets its CronJob again
+                            _SEEN.discard(("default", f"{name}-job"))
+            except ApiException as e:
+                if e.status == 410:
+                    # resourceVersion expired: fall back to a fresh list+watch
+                    print("♻️ Watch expired, relisting CronTabs")
+                    rv = ""
+                else:
+                    print(f"⚠️ Watch failed: {e}")
+                    await asyncio.sleep(5)
+            except Exception as e:
+                print(f"⚠️ Watch failed: {e}")
+                await asyncio.sleep(5)
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(reconcile())